@@ -1,260 +1,762 @@
-import asyncio
-import logging
-import os
-import sys
-import time
-from typing import Dict, Optional, List
-
-from playwright.async_api import async_playwright, Page, BrowserContext
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# --- CONFIGURATION ---
-# Logging Configuration
-LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL, logging.INFO),
-    format="%(asctime)s - [%(levelname)s] - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
-
-# Twitch Channels
-CHANNELS_ENV = os.getenv("CHANNELS", "")
-CHANNELS = [c.strip() for c in CHANNELS_ENV.split(",") if c.strip()]
-
-# Twitch Username
-MY_USERNAME = os.getenv("MY_USERNAME")
-
-# Browser Configuration
-HEADLESS = os.getenv("HEADLESS", "False").lower() == "true"
-USER_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "twitch_user_data")
-
-# Timings
-TAB_SWITCH_DELAY = 30
-OFFLINE_COOLDOWN = 3600  # 1 hour
-RESTART_INTERVAL = 14400 # 4 hours
-
-class TwitchFarmer:
-    def __init__(self):
-        self.channel_states: Dict[str, Dict] = {
-            name: {"page": None, "next_check": 0} for name in CHANNELS
-        }
-
-    async def launch_browser(self, p) -> BrowserContext:
-        logging.info(f"Launching browser with user data dir: {USER_DATA_DIR}")
-        return await p.chromium.launch_persistent_context(
-            USER_DATA_DIR,
-            headless=HEADLESS,
-            channel="chrome",
-            args=["--disable-blink-features=AutomationControlled"]
-        )
-
-    async def check_channel_status(self, page: Page, name: str) -> bool:
-        """Checks if the channel is offline. Returns True if offline."""
-        is_offline = False
-        
-        # 1. Check for "Chat" tab (standard offline view)
-        try:
-            chat_tab = page.get_by_role("tab", name="Chat")
-            if await chat_tab.is_visible():
-                is_offline = True
-        except Exception:
-            pass
-
-        # 2. Check for missing video player
-        if not is_offline:
-            try:
-                if not await page.locator("video").first.is_visible():
-                    is_offline = True
-                    logging.info(f"[{name}] Video player not visible. Assuming OFFLINE.")
-            except Exception:
-                pass
-        
-        return is_offline
-
-    async def claim_bonus(self, page: Page, name: str):
-        """Checks for and claims the bonus chest."""
-        bonus_selector = "button[aria-label='Claim Bonus']"
-        try:
-            if await page.locator(bonus_selector).count() > 0:
-                if await page.locator(bonus_selector).is_visible():
-                    logging.info(f"[{name}] Bonus detected! Clicking...")
-                    await page.click(bonus_selector)
-                    logging.info(f"[{name}] Clicked bonus chest!")
-        except Exception as e:
-            logging.error(f"[{name}] Error claiming bonus: {e}")
-
-    async def log_channel_points(self, page: Page, name: str):
-        """Logs the current channel points."""
-        try:
-            balance_selector = '[data-test-selector="balance-string"]'
-            if await page.locator(balance_selector).is_visible():
-                points = await page.locator(balance_selector).inner_text()
-                logging.info(f"[{name}] Current Channel Points: {points}")
-        except Exception:
-            pass
-
-    async def check_chat_list(self, page: Page, name: str):
-        """Checks if MY_USERNAME is present in the chat list."""
-        if not MY_USERNAME:
-            return
-
-        logging.info(f"[{name}] Checking if '{MY_USERNAME}' is in chat list...")
-        try:
-            community_btn = page.locator("button[aria-label='Community']")
-            if await community_btn.is_visible():
-                await community_btn.click(timeout=3000)
-                
-                try:
-                    await asyncio.sleep(1)
-                    search_input = page.get_by_placeholder("Filter", exact=False)
-                    
-                    if await search_input.is_visible():
-                        logging.info(f"[{name}] Filtering for '{MY_USERNAME}'...")
-                        await search_input.click()
-                        await search_input.fill(MY_USERNAME)
-                        await asyncio.sleep(1)
-                    else:
-                        logging.warning(f"[{name}] Warning: Could not find 'Filter' input. Checking visible list only.")
-
-                    if await page.get_by_text(MY_USERNAME, exact=True).is_visible():
-                        logging.info(f"[{name}] STATUS: '{MY_USERNAME}' FOUND in chat list! ✅")
-                    else:
-                        logging.info(f"[{name}] STATUS: '{MY_USERNAME}' NOT FOUND in chat list. ❌")
-                finally:
-                    # Close the list
-                    try:
-                        back_btn = page.locator("button[aria-label='Go back to Chat']")
-                        if await back_btn.count() == 0:
-                            back_btn = page.locator("button[aria-label='Close']")
-                        
-                        if await back_btn.is_visible():
-                            await back_btn.click(timeout=3000)
-                            logging.info(f"[{name}] Closed community tab.")
-                        elif await community_btn.is_visible():
-                            await community_btn.click(timeout=3000)
-                            logging.info(f"[{name}] Closed community tab (Toggle).")
-                        else:
-                            logging.warning(f"[{name}] Warning: Could not find button to close list.")
-                    except Exception as e:
-                        logging.warning(f"[{name}] Warning: Could not close community tab: {e}")
-            else:
-                logging.warning(f"[{name}] Could not find Community button.")
-        except Exception as e:
-            logging.error(f"[{name}] Error checking chat list: {e}")
-
-    async def process_channel(self, context: BrowserContext, name: str, current_time: float):
-        state = self.channel_states[name]
-        page = state["page"]
-        next_check = state["next_check"]
-
-        # Open tab if needed
-        if page is None:
-            if current_time >= next_check:
-                logging.info(f"[{name}] Checking channel (opening tab)...")
-                try:
-                    new_page = await context.new_page()
-                    await new_page.goto(f"https://www.twitch.tv/{name}")
-                    state["page"] = new_page
-                    await asyncio.sleep(5) # Wait for load
-                except Exception as e:
-                    logging.error(f"[{name}] Error opening tab: {e}")
-            return
-
-        # Process open tab
-        try:
-            # Bring to front
-            try:
-                await page.bring_to_front()
-            except Exception:
-                state["page"] = None
-                return
-
-            # Check for Raid / URL change
-            current_url = page.url.lower()
-            expected_url = f"https://www.twitch.tv/{name}".lower()
-            if current_url != expected_url and not current_url.startswith(expected_url + "/") and not current_url.startswith(expected_url + "?"):
-                logging.info(f"[{name}] URL changed to {page.url} (Raid detected). Closing tab.")
-                await page.close()
-                state["page"] = None
-                state["next_check"] = current_time + OFFLINE_COOLDOWN
-                return
-
-            # Check Offline
-            if await self.check_channel_status(page, name):
-                logging.info(f"[{name}] Stream appears OFFLINE. Closing tab for 1 hour.")
-                await page.close()
-                state["page"] = None
-                state["next_check"] = current_time + OFFLINE_COOLDOWN
-                return
-
-            # Enforce volume
-            try:
-                await page.evaluate("""
-                    const video = document.querySelector('video');
-                    if (video) {
-                        if (video.volume !== 0.01 || video.muted) {
-                            video.volume = 0.01;
-                            video.muted = false;
-                        }
-                    }
-                """)
-            except Exception:
-                pass
-
-            # Claim Bonus
-            await self.claim_bonus(page, name)
-
-            # Log Channel Points
-            await self.log_channel_points(page, name)
-
-            # Wait
-            await asyncio.sleep(TAB_SWITCH_DELAY)
-
-            # Check Chat List
-            await self.check_chat_list(page, name)
-
-        except Exception as e:
-            logging.error(f"[{name}] Error processing: {e}")
-            try:
-                await page.close()
-            except:
-                pass
-            state["page"] = None
-
-    async def run(self):
-        async with async_playwright() as p:
-            context = await self.launch_browser(p)
-            
-            logging.info("Monitoring started. Channels will be checked periodically.")
-            logging.info("IMPORTANT: If you are not logged in, please log in manually in the browser window now.")
-
-            start_time = time.time()
-            while True:
-                if time.time() - start_time > RESTART_INTERVAL:
-                    logging.info(f"Restart interval of {RESTART_INTERVAL}s reached. Restarting script...")
-                    break
-
-                current_time = time.time()
-                for name in CHANNELS:
-                    await self.process_channel(context, name, current_time)
-                
-                await asyncio.sleep(2)
-
-if __name__ == "__main__":
-    should_restart = True
-    try:
-        farmer = TwitchFarmer()
-        asyncio.run(farmer.run())
-    except KeyboardInterrupt:
-        logging.info("Script stopped by user.")
-        should_restart = False
-    except Exception as e:
-        logging.critical(f"Unexpected error: {e}")
-        should_restart = False
-
-    if should_restart:
-        logging.info("Re-executing script to apply updates...")
-        os.execv(sys.executable, [sys.executable] + sys.argv)
+import asyncio
+import inspect
+import logging
+import os
+import time
+import types
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, List
+from urllib.parse import urlsplit
+
+# Playwright captures a full inspect.stack() for API-call metadata on every
+# request, which is pure overhead for a long-running farmer with many tabs.
+# Swap the inspect module seen by playwright's connection layer for a shim
+# whose stack() is a no-op. Set PW_INSPECT_STACK=1 to keep real stacks for
+# debugging.
+if os.getenv("PW_INSPECT_STACK", "0") != "1":
+    try:
+        from playwright._impl import _connection as _pw_connection
+
+        _pw_inspect = types.SimpleNamespace(**vars(inspect))
+        _pw_inspect.stack = lambda context=1: []
+        _pw_connection.inspect = _pw_inspect
+    except Exception:
+        pass
+
+from playwright.async_api import async_playwright, Page, BrowserContext
+from playwright.async_api import TimeoutError as PWTimeoutError
+from dotenv import load_dotenv
+
+# aiohttp enables the direct GraphQL path for claiming and balance polling;
+# without it the farmer stays on the DOM path.
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# uvloop's C event loop is a drop-in speedup for this I/O-bound workload;
+# fall back to the stock loop where it isn't available (e.g. Windows).
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+
+@dataclass(frozen=True)
+class Config:
+    """Environment-derived settings, parsed once at startup.
+
+    Keeping the parsing out of import time makes the module cheap to import
+    and the configuration explicit to pass around.
+    """
+    channels: tuple
+    my_username: Optional[str]
+    headless: bool
+    # Block HLS video segments via CDP so renderers stop decoding frames.
+    # The points heartbeat keeps running, but offline detection loses the
+    # video signal and relies on the Chat-tab check alone, hence opt-in.
+    low_cpu_mode: bool
+    # Cookies/localStorage snapshot used to carry the login between
+    # contexts; lighter than a full on-disk Chrome profile.
+    state_file: str
+    log_level: str
+
+
+def load_config() -> Config:
+    load_dotenv()
+    channels_env = os.getenv("CHANNELS", "")
+    return Config(
+        channels=tuple(c.strip() for c in channels_env.split(",") if c.strip()),
+        my_username=os.getenv("MY_USERNAME"),
+        headless=os.getenv("HEADLESS", "False").lower() == "true",
+        low_cpu_mode=os.getenv("LOW_CPU_MODE", "False").lower() == "true",
+        state_file=os.path.join(os.path.dirname(os.path.abspath(__file__)), "twitch_state.json"),
+        log_level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    )
+
+# Timings
+TAB_SWITCH_DELAY = 30    # How often the "active" channel rotates
+ACTIVE_INTERVAL = 10     # Re-probe interval for the active channel
+BACKGROUND_INTERVAL = 90 # Re-probe interval for backgrounded channels
+CHAT_LIST_INTERVAL = 600 # How often to verify presence in the chat list
+OFFLINE_COOLDOWN = 3600  # 1 hour
+RESTART_INTERVAL = 14400 # 4 hours
+
+# Concurrency
+MAX_PARALLEL = 4  # Cap on channels processed simultaneously
+MAX_OPEN_TABS = 6 # Cap on simultaneously open tabs (LRU-evicted beyond this)
+
+# Request filtering: heavy static assets are only allowed from Twitch's own
+# hosts (ttvnw.net/jtvnw.net are the Twitch CDNs serving the video itself),
+# and known ad/analytics hosts are dropped entirely.
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+ALLOWED_HOST_MARKERS = ("twitch", "ttvnw.net", "jtvnw.net")
+TRACKER_HOSTS = ("google-analytics", "doubleclick", "amazon-adsystem", "scorecardresearch")
+
+# Single-round-trip DOM probe: offline detection, bonus chest and points
+# balance in one evaluate instead of ~6 locator calls. Audio is muted at the
+# browser level (--mute-audio), so no volume enforcement is needed here.
+PAGE_PROBE_JS = """
+LOW_CPU => {
+    const q = s => document.querySelector(s);
+    const vis = el => !!el && el.offsetParent !== null;
+    const chat = [...document.querySelectorAll('[role="tab"]')]
+        .find(t => t.textContent.trim() === 'Chat');
+    const bonus = q("button[aria-label='Claim Bonus']");
+    const bal = q('[data-test-selector="balance-string"]');
+    const video = q('video');
+    return {
+        offline: LOW_CPU ? vis(chat) : (vis(chat) || !vis(video)),
+        bonusVisible: vis(bonus),
+        balance: bal ? bal.innerText : null,
+    };
+}
+"""
+
+# MutationObserver that pings the exposed __bonusSeen binding the moment the
+# bonus chest is inserted into the DOM, so claims do not wait for the next
+# probe pass. Rate-limited in-page so DOM churn cannot spam the binding.
+BONUS_OBSERVER_JS = """
+() => {
+    if (window.__bonusObserver) return;
+    let lastFire = 0;
+    const check = () => {
+        const b = document.querySelector("button[aria-label='Claim Bonus']");
+        if (b && window.__bonusSeen && Date.now() - lastFire > 15000) {
+            lastFire = Date.now();
+            window.__bonusSeen();
+        }
+    };
+    window.__bonusObserver = new MutationObserver(check);
+    window.__bonusObserver.observe(document.body, {childList: true, subtree: true});
+}
+"""
+
+# Twitch's chat UI keeps its data in the Apollo client cache; reading it is
+# one evaluate with no panel interaction. Returns null when the cache is not
+# reachable so the caller can fall back to the UI path.
+CHAT_USER_IN_CACHE_JS = """
+uname => {
+    const cli = window.__APOLLO_CLIENT__;
+    if (!cli || !cli.cache || !cli.cache.extract) return null;
+    const target = uname.toLowerCase();
+    return Object.values(cli.cache.extract()).some(
+        v => v && typeof v.login === 'string' && v.login.toLowerCase() === target);
+}
+"""
+
+# Scoped exact-match lookup in the (filtered) viewer list. One round-trip and
+# a small JS walk instead of Playwright's text engine over the whole DOM.
+CHAT_USER_PRESENT_JS = """
+uname => {
+    const nodes = document.querySelectorAll(
+        '[data-a-target="viewer-card-toggle"], .chat-viewers-list *');
+    for (const n of nodes) {
+        if (n.textContent.trim() === uname) return true;
+    }
+    return false;
+}
+"""
+
+class TwitchGQL:
+    """Minimal client for Twitch's GraphQL API, authenticated with the
+    browser's own auth-token cookie.
+
+    Claiming the bonus and reading the balance are single persisted-query
+    POSTs here, which is far cheaper than driving the rendered DOM.
+    """
+
+    URL = "https://gql.twitch.tv/gql"
+    # Client-ID of the Twitch web player; persisted-query hashes below belong
+    # to the same web client.
+    CLIENT_ID = "kimne78kx3ncx6brgo4mv6wki5h1ko"
+    SHA_CHANNEL_POINTS_CONTEXT = "1530a003a7d374b0380b79db0be0534f30ff46e61cffa2bc0e2468a909fbc024"
+    SHA_CLAIM_COMMUNITY_POINTS = "46aaeebe02c99afdf4fc97c7c0cba964124bf6b0af229395f1f6d1feed05b3d0"
+
+    def __init__(self, auth_token: str):
+        self.session = aiohttp.ClientSession(headers={
+            "Client-ID": self.CLIENT_ID,
+            "Authorization": f"OAuth {auth_token}",
+        })
+
+    async def close(self):
+        await self.session.close()
+
+    async def _post(self, operation: str, sha: str, variables: Dict) -> Optional[Dict]:
+        payload = {
+            "operationName": operation,
+            "variables": variables,
+            "extensions": {"persistedQuery": {"version": 1, "sha256Hash": sha}},
+        }
+        async with self.session.post(self.URL, json=payload) as resp:
+            body = await resp.json()
+        return body.get("data")
+
+    async def channel_points_context(self, channel_login: str) -> Optional[Dict]:
+        """Returns {"channel_id", "balance", "claim_id"} or None."""
+        data = await self._post(
+            "ChannelPointsContext",
+            self.SHA_CHANNEL_POINTS_CONTEXT,
+            {"channelLogin": channel_login},
+        )
+        community = (data or {}).get("community")
+        if not community:
+            return None
+        points = community["channel"]["self"]["communityPoints"]
+        claim = points.get("availableClaim")
+        return {
+            "channel_id": community["id"],
+            "balance": points.get("balance"),
+            "claim_id": claim["id"] if claim else None,
+        }
+
+    async def claim_bonus(self, channel_id: str, claim_id: str):
+        await self._post(
+            "ClaimCommunityPoints",
+            self.SHA_CLAIM_COMMUNITY_POINTS,
+            {"input": {"channelID": channel_id, "claimID": claim_id}},
+        )
+
+
+@dataclass(slots=True)
+class ChannelState:
+    """Per-channel bookkeeping, slotted to keep attribute access and memory
+    cheap in the per-tick hot path."""
+    name: str
+    lname: str = ""
+    page: Optional[Page] = None
+    parked: bool = False
+    next_check: float = 0.0
+    next_action: float = 0.0
+    next_chat_check: float = 0.0
+    locators: Dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.lname = self.name.lower()
+
+
+class TwitchFarmer:
+    def __init__(self, config: Config):
+        self.config = config
+        self.channel_states: List[ChannelState] = [ChannelState(name) for name in config.channels]
+        self.states_by_name: Dict[str, ChannelState] = {s.name: s for s in self.channel_states}
+        self.semaphore = asyncio.Semaphore(MAX_PARALLEL)
+        self.gql: Optional[TwitchGQL] = None
+        # Least-recently-processed order of open tabs, for MAX_OPEN_TABS eviction
+        self.lru: "OrderedDict[str, float]" = OrderedDict()
+
+    @staticmethod
+    def build_locators(page: Page) -> Dict:
+        """Builds the Locator handles for a freshly opened tab.
+
+        Locators are lazy handles, so constructing them once per tab and
+        reusing them avoids a Playwright round-trip per selector per cycle.
+        """
+        return {
+            "bonus": page.locator("button[aria-label='Claim Bonus']"),
+            "community": page.locator("button[aria-label='Community']"),
+            "filter": page.get_by_placeholder("Filter", exact=False),
+            "back": page.locator("button[aria-label='Go back to Chat']"),
+            "close": page.locator("button[aria-label='Close']"),
+        }
+
+    @staticmethod
+    async def filter_request(route):
+        """Aborts requests the farmer never looks at: thumbnails, fonts and
+        media from third-party hosts, plus ad/analytics trackers."""
+        request = route.request
+        url = request.url
+        if request.resource_type in BLOCKED_RESOURCE_TYPES and not any(h in url for h in ALLOWED_HOST_MARKERS):
+            return await route.abort()
+        if any(h in url for h in TRACKER_HOSTS):
+            return await route.abort()
+        await route.continue_()
+
+    async def launch_browser(self, p):
+        logger.info("Launching browser...")
+        return await p.chromium.launch(
+            headless=self.config.headless,
+            channel="chrome",
+            args=[
+                "--disable-blink-features=AutomationControlled",
+                # Keep long-session memory in check: few renderers, small V8
+                # heap per renderer, and no features the farmer benefits from
+                "--renderer-process-limit=2",
+                "--js-flags=--max-old-space-size=256",
+                "--disable-features=Translate,BackForwardCache,CalculateNativeWinOcclusion",
+                # Muted at the browser level; removes the need to manage the
+                # player volume from the probe
+                "--mute-audio",
+                # Background tabs must keep their timers and renderers
+                # running: nothing is ever foregrounded, and Twitch's points
+                # heartbeat lives in page timers
+                "--disable-background-timer-throttling",
+                "--disable-backgrounding-occluded-windows",
+                "--disable-renderer-backgrounding",
+            ]
+        )
+
+    async def new_context(self, browser) -> BrowserContext:
+        """Creates a fresh context seeded from the saved session state."""
+        context = await browser.new_context(
+            storage_state=self.config.state_file if os.path.exists(self.config.state_file) else None,
+            # Service workers only run Twitch's background prefetch/analytics
+            # here; blocking them saves CPU and avoids a known leak source in
+            # long-lived contexts. bypass_csp keeps the combined probe
+            # evaluate working under Twitch's strict CSP.
+            service_workers="block",
+            bypass_csp=True,
+            accept_downloads=False,
+        )
+        # Register the stealth payload as an init script: every page the
+        # context ever opens gets it before the document loads, with no
+        # per-page apply call or extra round-trip.
+        try:
+            from playwright_stealth import Stealth
+            await context.add_init_script(Stealth().script_payload)
+        except ImportError:
+            logger.warning("playwright-stealth not installed; running without stealth patches.")
+        except Exception as e:
+            logger.warning("Could not register stealth init script: %s", e)
+        await context.route("**/*", self.filter_request)
+        return context
+
+    async def save_storage_state(self, context: BrowserContext):
+        """Persists cookies/localStorage so the next context keeps the login."""
+        try:
+            await context.storage_state(path=self.config.state_file)
+            logger.info("Saved session state to %s", self.config.state_file)
+        except Exception as e:
+            logger.warning("Could not save session state: %s", e)
+
+    async def init_gql(self, context: BrowserContext):
+        """Builds the GraphQL client from the browser's auth cookie.
+
+        Falls back to the DOM path (self.gql stays None) when aiohttp is
+        missing or the user is not logged in yet.
+        """
+        if aiohttp is None:
+            logger.info("aiohttp not installed; claiming via the DOM instead of GraphQL.")
+            return
+        try:
+            cookies = await context.cookies("https://www.twitch.tv")
+            token = next((c["value"] for c in cookies if c["name"] == "auth-token"), None)
+            if token:
+                self.gql = TwitchGQL(token)
+                logger.info("GraphQL path enabled: claims and balance polling bypass the DOM.")
+            else:
+                logger.info("No auth-token cookie found; claiming via the DOM instead of GraphQL.")
+        except Exception as e:
+            logger.warning("Could not initialize GraphQL client: %s", e)
+
+    async def close_gql(self):
+        if self.gql is not None:
+            try:
+                await self.gql.close()
+            except Exception:
+                pass
+            self.gql = None
+
+    async def farm_points_gql(self, state: ChannelState, name: str) -> bool:
+        """Claims the bonus and logs the balance via GraphQL.
+
+        Returns False when the call failed, so the caller can fall back to
+        the DOM probe results.
+        """
+        try:
+            ctx = await self.gql.channel_points_context(state.lname)
+            if ctx is None:
+                return False
+            if ctx["balance"] is not None:
+                logger.info("[%s] Current Channel Points: %s", name, ctx['balance'])
+            if ctx["claim_id"]:
+                logger.info("[%s] Bonus detected! Claiming via GraphQL...", name)
+                await self.gql.claim_bonus(ctx["channel_id"], ctx["claim_id"])
+                logger.info("[%s] Claimed bonus chest!", name)
+            return True
+        except Exception as e:
+            logger.error("[%s] Error claiming via GraphQL: %s", name, e)
+            return False
+
+    async def install_bonus_observer(self, page: Page, state: ChannelState):
+        """Claims bonuses on the DOM-insertion event instead of by polling.
+
+        The page-side MutationObserver calls the exposed binding when the
+        chest appears; the probe's bonusVisible check stays as a fallback for
+        anything the observer misses.
+        """
+        name = state.name
+
+        async def on_bonus(source):
+            logger.info("[%s] Bonus chest appeared (observer).", name)
+            if self.gql is not None and await self.farm_points_gql(state, name):
+                return
+            if state.locators:
+                await self.claim_bonus(state.locators, name)
+
+        try:
+            await page.expose_binding("__bonusSeen", lambda source: asyncio.create_task(on_bonus(source)))
+            await page.evaluate(BONUS_OBSERVER_JS)
+        except Exception as e:
+            logger.warning("[%s] Could not install bonus observer: %s", name, e)
+
+    async def throttle_video(self, page: Page, name: str):
+        """Blocks video segment requests over CDP (LOW_CPU_MODE).
+
+        The renderer stops decoding frames while the page's PubSub/GraphQL
+        heartbeat keeps accruing points. Blocked URLs persist for the CDP
+        session, so parked tabs stay throttled after re-navigation.
+        """
+        try:
+            cdp = await page.context.new_cdp_session(page)
+            await cdp.send("Network.enable")
+            await cdp.send("Network.setBlockedURLs", {"urls": ["*usher.ttvnw.net*", "*.ts"]})
+        except Exception as e:
+            logger.warning("[%s] Could not enable video throttling: %s", name, e)
+
+    async def evict_lru_tab(self, current_time: float):
+        """Closes the least-recently-processed open tab.
+
+        Keeps at most MAX_OPEN_TABS renderers alive regardless of how many
+        channels are configured; the evicted channel is revisited shortly.
+        """
+        while self.lru:
+            name, _ = self.lru.popitem(last=False)
+            state = self.states_by_name.get(name)
+            if state is None or state.page is None:
+                continue
+            logger.info("[%s] Evicting tab (open-tab cap of %s reached).", name, MAX_OPEN_TABS)
+            try:
+                await state.page.close()
+            except Exception:
+                pass
+            state.page = None
+            state.locators = {}
+            state.parked = False
+            state.next_check = current_time + BACKGROUND_INTERVAL
+            return
+
+    async def park_page(self, state: ChannelState, name: str):
+        """Parks the tab on about:blank instead of closing it.
+
+        Keeps the Chrome tab (and its renderer) warm so the next check is a
+        plain navigation rather than a tab create + teardown. Falls back to
+        closing if the tab is wedged.
+        """
+        page = state.page
+        try:
+            await page.goto("about:blank")
+            state.parked = True
+        except Exception as e:
+            logger.warning("[%s] Could not park tab, closing it instead: %s", name, e)
+            try:
+                await page.close()
+            except Exception:
+                pass
+            state.page = None
+            state.locators = {}
+            state.parked = False
+
+    async def claim_bonus(self, locs: Dict, name: str):
+        """Clicks the bonus chest (the probe has already seen it visible)."""
+        try:
+            logger.info("[%s] Bonus detected! Clicking...", name)
+            await locs["bonus"].click(timeout=2000)
+            logger.info("[%s] Clicked bonus chest!", name)
+        except PWTimeoutError:
+            # Chest disappeared between probe and click; the next pass will
+            # catch a new one
+            logger.warning("[%s] Bonus chest vanished before it could be clicked.", name)
+
+    async def check_chat_list(self, page: Page, locs: Dict, name: str):
+        """Checks if the configured username is present in the chat list."""
+        username = self.config.my_username
+        if not username:
+            return
+
+        logger.info("[%s] Checking if '%s' is in chat list...", name, username)
+
+        # Fast path: read the Apollo cache directly - no panel interaction
+        try:
+            present = await page.evaluate(CHAT_USER_IN_CACHE_JS, username)
+        except Exception:
+            present = None
+        if present is not None:
+            if present:
+                logger.info("[%s] STATUS: '%s' FOUND in chat list (cache)! ✅", name, username)
+            else:
+                logger.info("[%s] STATUS: '%s' NOT FOUND in chat list (cache). ❌", name, username)
+            return
+
+        # Fallback: drive the Community panel UI
+        try:
+            community_btn = locs["community"]
+            if await community_btn.is_visible():
+                await community_btn.click(timeout=3000)
+                
+                try:
+                    search_input = locs["filter"]
+                    try:
+                        await search_input.wait_for(state="visible", timeout=5000)
+                        filter_visible = True
+                    except PWTimeoutError:
+                        filter_visible = False
+
+                    if filter_visible:
+                        logger.info("[%s] Filtering for '%s'...", name, username)
+                        await search_input.click()
+                        await search_input.fill(username)
+                        # Wait for the filtered results to render rather than
+                        # sleeping a fixed second
+                        try:
+                            await page.wait_for_function(
+                                """document.querySelectorAll(
+                                    '[data-a-target="viewer-card-toggle"], .chat-viewers-list *').length > 0""",
+                                timeout=3000
+                            )
+                        except PWTimeoutError:
+                            pass
+                    else:
+                        logger.warning("[%s] Warning: Could not find 'Filter' input. Checking visible list only.", name)
+
+                    if await page.evaluate(CHAT_USER_PRESENT_JS, username):
+                        logger.info("[%s] STATUS: '%s' FOUND in chat list! ✅", name, username)
+                    else:
+                        logger.info("[%s] STATUS: '%s' NOT FOUND in chat list. ❌", name, username)
+                finally:
+                    # Close the list
+                    try:
+                        # is_visible() is False for zero matches, so no
+                        # separate count() round-trip is needed
+                        back_btn = locs["back"]
+                        if not await back_btn.is_visible():
+                            back_btn = locs["close"]
+
+                        if await back_btn.is_visible():
+                            await back_btn.click(timeout=3000)
+                            logger.info("[%s] Closed community tab.", name)
+                        elif await community_btn.is_visible():
+                            await community_btn.click(timeout=3000)
+                            logger.info("[%s] Closed community tab (Toggle).", name)
+                        else:
+                            logger.warning("[%s] Warning: Could not find button to close list.", name)
+                    except Exception as e:
+                        logger.warning("[%s] Warning: Could not close community tab: %s", name, e)
+            else:
+                logger.warning("[%s] Could not find Community button.", name)
+        except Exception as e:
+            logger.error("[%s] Error checking chat list: %s", name, e)
+
+    async def process_channel(self, context: BrowserContext, state: ChannelState, current_time: float, active: bool):
+        # Cap simultaneous browser pressure (navigation, DOM probes) across tasks
+        async with self.semaphore:
+            await self._process_channel(context, state, current_time, active)
+
+    async def _process_channel(self, context: BrowserContext, state: ChannelState, current_time: float, active: bool):
+        name = state.name
+        page = state.page
+        next_check = state.next_check
+
+        # Open tab if needed
+        if page is None:
+            if current_time >= next_check:
+                logger.info("[%s] Checking channel (opening tab)...", name)
+                try:
+                    if sum(1 for s in self.channel_states if s.page is not None) >= MAX_OPEN_TABS:
+                        await self.evict_lru_tab(current_time)
+                    new_page = await context.new_page()
+                    await new_page.goto(f"https://www.twitch.tv/{name}")
+                    state.page = new_page
+                    state.locators = self.build_locators(new_page)
+                    if self.config.low_cpu_mode:
+                        await self.throttle_video(new_page, name)
+                    self.lru[name] = current_time
+                    self.lru.move_to_end(name)
+                    await new_page.wait_for_load_state("domcontentloaded", timeout=15000)
+                    await self.install_bonus_observer(new_page, state)
+                except Exception as e:
+                    logger.error("[%s] Error opening tab: %s", name, e)
+            return
+
+        # Parked tab: reuse it with a plain navigation once the cooldown ends
+        if state.parked:
+            if current_time >= next_check:
+                logger.info("[%s] Checking channel (reusing parked tab)...", name)
+                try:
+                    await page.goto(f"https://www.twitch.tv/{name}")
+                    state.parked = False
+                    await page.wait_for_load_state("domcontentloaded", timeout=15000)
+                    # The binding survives navigation but the observer does not
+                    try:
+                        await page.evaluate(BONUS_OBSERVER_JS)
+                    except Exception:
+                        pass
+                except Exception as e:
+                    logger.error("[%s] Error reusing parked tab: %s", name, e)
+            return
+
+        # Not due for work yet
+        if current_time < state.next_action:
+            return
+
+        locs = state.locators
+        self.lru[name] = current_time
+        self.lru.move_to_end(name)
+
+        # Process open tab
+        try:
+            # Check for Raid / URL change: the first path segment must still
+            # be this channel
+            first_segment = urlsplit(page.url).path.lstrip("/").split("/", 1)[0].lower()
+            if first_segment != state.lname:
+                logger.info("[%s] URL changed to %s (Raid detected). Parking tab.", name, page.url)
+                await self.park_page(state, name)
+                state.next_check = current_time + OFFLINE_COOLDOWN
+                return
+
+            # One round-trip: offline state, bonus chest, balance and volume
+            probe = await page.evaluate(PAGE_PROBE_JS, self.config.low_cpu_mode)
+
+            # Check Offline
+            if probe["offline"]:
+                logger.info("[%s] Stream appears OFFLINE. Parking tab for 1 hour.", name)
+                await self.park_page(state, name)
+                state.next_check = current_time + OFFLINE_COOLDOWN
+                return
+
+            # Claim Bonus / Log Channel Points: one GraphQL POST when the
+            # client is available, otherwise the DOM probe results
+            handled = self.gql is not None and await self.farm_points_gql(state, name)
+            if not handled:
+                if probe["bonusVisible"]:
+                    await self.claim_bonus(locs, name)
+                if probe["balance"]:
+                    logger.info("[%s] Current Channel Points: %s", name, probe['balance'])
+
+            if active:
+                # Full treatment for the active channel only. The chat-list
+                # interaction is the heaviest step and presence changes on
+                # the order of minutes, so it runs on its own slow interval.
+                if current_time >= state.next_chat_check:
+                    await self.check_chat_list(page, locs, name)
+                    state.next_chat_check = current_time + CHAT_LIST_INTERVAL
+                state.next_action = current_time + ACTIVE_INTERVAL
+            else:
+                # Backgrounded channels just got the cheap probe + bonus pass
+                state.next_action = current_time + BACKGROUND_INTERVAL
+
+        except Exception as e:
+            logger.error("[%s] Error processing: %s", name, e)
+            try:
+                await page.close()
+            except:
+                pass
+            state.page = None
+            state.locators = {}
+            state.parked = False
+
+    def reset_channel_states(self):
+        """Clears all per-channel page state after a context recycle."""
+        self.lru.clear()
+        for state in self.channel_states:
+            state.page = None
+            state.locators = {}
+            state.parked = False
+            state.next_check = 0.0
+            state.next_action = 0.0
+            state.next_chat_check = 0.0
+
+    async def run(self):
+        async with async_playwright() as p:
+            browser = await self.launch_browser(p)
+            while True:
+                context = await self.new_context(browser)
+                await self.init_gql(context)
+
+                logger.info("Monitoring started. Channels will be checked periodically.")
+                logger.info("IMPORTANT: If you are not logged in, please log in manually in the browser window now.")
+
+                try:
+                    await self.monitor(context)
+                finally:
+                    # Keep the login across contexts (and across runs) even
+                    # when monitor() is interrupted.
+                    await self.save_storage_state(context)
+
+                # Recycle the context in-process: the saved storage state
+                # carries the login, and the browser process, Playwright
+                # driver and event loop all stay warm.
+                logger.info("Restart interval of %ss reached. Recycling browser context...", RESTART_INTERVAL)
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.warning("Error closing context during recycle: %s", e)
+                await self.close_gql()
+                self.reset_channel_states()
+
+    def is_active(self, state: ChannelState, now: float) -> bool:
+        """Whether this channel currently holds the rotating "active" slot.
+
+        Derived from the clock so the independent channel tasks agree on the
+        rotation without any shared bookkeeping.
+        """
+        states = self.channel_states
+        return states[int(now / TAB_SWITCH_DELAY) % len(states)] is state
+
+    async def channel_loop(self, context: BrowserContext, state: ChannelState):
+        """Long-lived task for one channel.
+
+        Sleeps until the channel's own next deadline instead of being walked
+        by a central tick, so an idle or cooled-down channel costs no
+        wake-ups at all.
+        """
+        while True:
+            now = time.monotonic()
+            if state.page is None or state.parked:
+                deadline = state.next_check
+            else:
+                deadline = state.next_action
+            # Floor of 2s between passes so error paths cannot spin
+            await asyncio.sleep(max(deadline - now, 2))
+            now = time.monotonic()
+            await self.process_channel(context, state, now, self.is_active(state, now))
+
+    async def monitor(self, context: BrowserContext):
+        """Runs one task per channel until the restart interval elapses."""
+        if not self.channel_states:
+            logger.warning("No channels configured; nothing to monitor.")
+            await asyncio.sleep(RESTART_INTERVAL)
+            return
+
+        tasks = [
+            asyncio.create_task(self.channel_loop(context, state))
+            for state in self.channel_states
+        ]
+        done, pending = await asyncio.wait(tasks, timeout=RESTART_INTERVAL)
+        # Channel loops only finish by raising; surface anything that died
+        for state, task in zip(self.channel_states, tasks):
+            if task in done and task.exception() is not None:
+                logger.error("[%s] Channel task died: %s", state.name, task.exception())
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+if __name__ == "__main__":
+    config = load_config()
+    logging.basicConfig(
+        level=getattr(logging, config.log_level, logging.INFO),
+        format="%(asctime)s - [%(levelname)s] - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S"
+    )
+    try:
+        farmer = TwitchFarmer(config)
+        asyncio.run(farmer.run())
+    except KeyboardInterrupt:
+        logger.info("Script stopped by user.")
+    except Exception as e:
+        logger.critical("Unexpected error: %s", e)